@@ -25,16 +25,25 @@ Usage:
   - `device`: Retrieve the configuration details of a specific device (e.g., pumps, heaters).
 """
 
-from ruamel.yaml import YAML
+import os
+import pickle
+import yaml
 from pathlib import Path
 
-# Initialize YAML parser for safe loading of YAML content
-yaml = YAML(typ="safe")
+# Prefer the libyaml-backed safe loader; fall back to the pure-Python one if libyaml is missing
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as _Loader
 
 def load_yaml(path: str | Path) -> dict:
     """
     Loads a YAML file and returns its content as a Python dictionary.
 
+    When the environment variable ``ICELENS_YAML_CACHE=1`` is set, the parsed content is also
+    stored in a sidecar pickle (``<file>.cache.pkl``) and reused as long as it is not older than
+    the YAML file itself.
+
     Args:
         path (str | Path): The path to the YAML file to be loaded.
 
@@ -47,7 +56,25 @@ def load_yaml(path: str | Path) -> dict:
     p = Path(path)
     if not p.exists():
         raise FileNotFoundError(p)
-    return yaml.load(p.read_text(encoding="utf-8"))
+
+    use_cache = os.environ.get("ICELENS_YAML_CACHE") == "1"
+    cache = p.with_suffix(p.suffix + ".cache.pkl")
+    if use_cache:
+        try:
+            if cache.exists() and cache.stat().st_mtime >= p.stat().st_mtime:
+                return pickle.loads(cache.read_bytes())
+        except Exception:
+            pass  # stale or corrupt cache: fall through and re-parse
+
+    # Pass raw bytes: the loader detects and decodes the encoding itself
+    obj = yaml.load(p.read_bytes(), Loader=_Loader)
+
+    if use_cache:
+        try:
+            cache.write_bytes(pickle.dumps(obj, protocol=5))
+        except OSError:
+            pass  # read-only location: just skip caching
+    return obj
 
 class PlantConfig:
     """
@@ -57,6 +84,7 @@ class PlantConfig:
         ports (dict): A dictionary containing port configurations (e.g., RS-485 settings).
         devices (dict): A dictionary containing the devices' configurations (e.g., pumps, heaters).
         points (dict): A dictionary mapping each tag to a specific device or sensor channel.
+            Each point's "scale" is normalized to {"gain": float, "offset": float}.
         logic (dict): A dictionary defining logical conditions and interlocks.
 
     Methods:
@@ -83,6 +111,25 @@ class PlantConfig:
         self.points: dict  = self._raw.get("points", {})  # Mapped points (e.g., sensors, outputs)
         self.logic: dict   = self._raw.get("logic", {})   # Logical conditions and interlocks
 
+        # Normalize every point's scale to {"gain": float, "offset": float} once at load time
+        for p in self.points.values():
+            p["scale"] = self._normalize_scale(p.get("scale"))
+
+    @staticmethod
+    def _normalize_scale(scale) -> dict:
+        """
+        Converts a point's optional scale entry into an explicit gain/offset pair.
+
+        Args:
+            scale: Either a mapping with optional "gain"/"offset" keys, a bare gain number, or None.
+
+        Returns:
+            dict: A dictionary of the form {"gain": float, "offset": float}.
+        """
+        if isinstance(scale, dict):
+            return {"gain": float(scale.get("gain", 1.0)), "offset": float(scale.get("offset", 0.0))}
+        return {"gain": float(scale or 1.0), "offset": 0.0}
+
     def get_bus_params(self, bus_name: str) -> dict:
         """
         Retrieves the parameters for a specific bus.
@@ -1,27 +1,34 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Optional
+from functools import lru_cache
+from array import array
+from typing import ClassVar, Optional
 from loguru import logger
 
 
 # --- Address helpers for "30xxx/40xxx" style tables ---
+@lru_cache(maxsize=None)
 def reg3x_to_offset(addr_3x: int) -> int:
     """Convert a 3x address (30001-based) to zero-based offset."""
     return max(0, addr_3x - 30001)
 
 
+@lru_cache(maxsize=None)
 def reg4x_to_offset(addr_4x: int) -> int:
     """Convert a 4x address (40001-based) to zero-based offset."""
     return max(0, addr_4x - 40001)
 
 
 # === Base device ===
-@dataclass
+# Slotted; subclasses declare empty __slots__ so instances carry no __dict__.
+@dataclass(slots=True)
 class BaseDev:
     name: str
     bus: any          # ModbusBus
     unit: int         # Modbus address
 
+    kind: ClassVar[str] = ""  # device type tag, used by the HAL for dispatch
+
 
 # === AI device (DAM-3151+H, 32-ch analog input) ===
 class AI(BaseDev):
@@ -33,21 +40,41 @@ class AI(BaseDev):
 
     We just return the raw register value. Scaling to engineering units is done via plant.yaml (scale.gain/offset).
     """
+    __slots__ = ()
+    kind = "AI"
     CH0_4X = 40001
+    _CH0_OFFSET = reg4x_to_offset(CH0_4X)  # resolved once at class creation
+
+    def valid_channel(self, ch: int) -> bool:
+        return 0 <= ch <= 31
 
     def read_channel(self, ch: int) -> Optional[int]:
         if ch < 0 or ch > 31:
             logger.warning(f"{self.name}: channel {ch} out of range for DAM-3151 (0–31)")
             return None
-        off = reg4x_to_offset(self.CH0_4X) + ch  # 40001 → 0, so off = ch
+        off = self._CH0_OFFSET + ch  # 40001 → 0, so off = ch
         regs = self.bus.read_holding(self.unit, off, 1)
         return None if regs is None else regs[0]
 
+    def read_block(self, first_ch: int, n: int) -> Optional[array]:
+        """Read n consecutive channels starting at first_ch in a single transaction."""
+        if first_ch < 0 or n < 1 or first_ch + n > 32:
+            logger.warning(f"{self.name}: channels {first_ch}..{first_ch + n - 1} out of range for DAM-3151 (0–31)")
+            return None
+        off = self._CH0_OFFSET + first_ch
+        return self.bus.read_holding(self.unit, off, n)
+
 
 # === TDA thermocouple device (DAM-3130D H or similar) ===
 class TDA(BaseDev):
+    __slots__ = ()
+    kind = "TDA"
+
     # Simple assumption: channel 1 -> input reg 0, channel n -> n-1 (3x space)
     # (Good enough for now; we can refine from the TDA manual later.)
+    def valid_channel(self, ch: int) -> bool:
+        return ch >= 1
+
     def read_channel(self, ch: int) -> Optional[int]:
         if ch <= 0:
             logger.warning(f"{self.name}: channel index should start from 1 (got {ch})")
@@ -56,55 +83,83 @@ class TDA(BaseDev):
         regs = self.bus.read_input(self.unit, off, 1)
         return None if regs is None else regs[0]
 
+    def read_block(self, first_ch: int, n: int) -> Optional[array]:
+        """Read n consecutive channels starting at first_ch in a single transaction."""
+        if first_ch <= 0 or n < 1:
+            logger.warning(f"{self.name}: channel index should start from 1 (got {first_ch})")
+            return None
+        return self.bus.read_input(self.unit, first_ch - 1, n)
+
 
 # === AO analog output (0–10 V, fixed 3 decimals) ===
 class AO(BaseDev):
+    __slots__ = ()
+    kind = "AO"
     # CH1 at 0x000A, CHn = base + (n-1)
     CH1_4X = 0x000A
 
-    def write_voltage_fixed3(self, ch: int, volts: float, reg_scale: int = 1000) -> bool:
+    def voltage_register(self, ch: int, volts: float, reg_scale: int = 1000) -> Optional[tuple[int, int]]:
+        """(address, raw) for a 0–10 V command on channel ch, or None if ch is invalid."""
+        if ch <= 0:
+            logger.warning(f"{self.name}: AO channel index should start from 1 (got {ch})")
+            return None
         volts = max(0.0, min(10.0, float(volts)))
-        raw = int(round(volts * reg_scale))
+        return self.CH1_4X + (ch - 1), int(round(volts * reg_scale))
+
+    def percent_register(self, ch: int, percent: float, reg_scale: int = 1000) -> Optional[tuple[int, int]]:
+        """(address, raw) for a 0–100 % (→ 0–10 V) command on channel ch, or None if ch is invalid."""
         if ch <= 0:
             logger.warning(f"{self.name}: AO channel index should start from 1 (got {ch})")
-            return False
-        address = self.CH1_4X + (ch - 1)
-        return self.bus.write_holding(self.unit, address, raw)
+            return None
+        # 0–100 % → 0–10 V → raw, folded into one scale and one clamp on the raw value
+        return self.CH1_4X + (ch - 1), max(0, min(10 * reg_scale, int(round(float(percent) * reg_scale / 10.0))))
+
+    def write_voltage_fixed3(self, ch: int, volts: float, reg_scale: int = 1000) -> bool:
+        reg = self.voltage_register(ch, volts, reg_scale)
+        return reg is not None and self.bus.write_holding(self.unit, *reg)
 
     def write_percent_to_0_10v(self, ch: int, percent: float, reg_scale: int = 1000) -> bool:
-        pct = max(0.0, min(100.0, float(percent)))
-        volts = 10.0 * pct / 100.0
-        return self.write_voltage_fixed3(ch, volts, reg_scale=reg_scale)
+        reg = self.percent_register(ch, percent, reg_scale)
+        return reg is not None and self.bus.write_holding(self.unit, *reg)
 
 
 # === PPS: programmable power supply (percent command) ===
 class PPS(BaseDev):
+    __slots__ = ()
+    kind = "PPS"
     CMD_4X = 0x0001
 
-    def write_percent(self, percent: float) -> bool:
+    def percent_register(self, percent: float) -> tuple[int, int]:
+        """(address, raw) for a percent command."""
         pct = max(0.0, min(100.0, float(percent)))
-        value = int(round(pct))
-        return self.bus.write_holding(self.unit, self.CMD_4X, value)
+        return self.CMD_4X, int(round(pct))
+
+    def write_percent(self, percent: float) -> bool:
+        return self.bus.write_holding(self.unit, *self.percent_register(percent))
 
 
 # === Pump: speed command in percent ===
 class Pump(BaseDev):
+    __slots__ = ()
+    kind = "PUMP"
     CMD_4X = 0x0001
 
-    def write_percent(self, percent: float) -> bool:
+    def percent_register(self, percent: float) -> tuple[int, int]:
+        """(address, raw) for a percent command."""
         pct = max(0.0, min(100.0, float(percent)))
-        value = int(round(pct))
-        return self.bus.write_holding(self.unit, self.CMD_4X, value)
+        return self.CMD_4X, int(round(pct))
+
+    def write_percent(self, percent: float) -> bool:
+        return self.bus.write_holding(self.unit, *self.percent_register(percent))
 
 
 # === Factory ===
+_DEVICE_TYPES: dict[str, type[BaseDev]] = {"AI": AI, "TDA": TDA, "AO": AO, "PPS": PPS, "PUMP": Pump}
+
+
 def make_device(dev_name: str, dev_cfg: dict, bus) -> BaseDev:
     t = dev_cfg["type"].upper()
-    unit = int(dev_cfg["addr"])
-    if   t == "AI":   return AI(dev_name, bus, unit)
-    elif t == "TDA":  return TDA(dev_name, bus, unit)
-    elif t == "AO":   return AO(dev_name, bus, unit)
-    elif t == "PPS":  return PPS(dev_name, bus, unit)
-    elif t == "PUMP": return Pump(dev_name, bus, unit)
-    else:
+    cls = _DEVICE_TYPES.get(t)
+    if cls is None:
         raise ValueError(f"Unknown device type: {t}")
+    return cls(dev_name, bus, int(dev_cfg["addr"]))
@@ -1,14 +1,15 @@
 from __future__ import annotations
-import threading, queue, time
+import sys, threading, queue, time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Any
+from typing import Any, Callable, Optional
 from loguru import logger
 
 from hal.config import PlantConfig
 from hal.modbus_bus import ModbusBus, BusSpec
-from hal.drivers import make_device, AO, AI, TDA, PPS, Pump
+from hal.drivers import make_device
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TagValue:
     """
     Represents a tag value with associated metadata.
@@ -22,6 +23,35 @@ class TagValue:
     ts: float
     quality: str  # "Good"/"Bad"/"Unknown"
 
+
+def _ao_encoder(dev, p: dict) -> Callable[[float], Optional[tuple[int, int]]]:
+    """Builds the register encoder for an AO channel (percent or volts, per the point config)."""
+    ch = int(p.get("channel", 1))
+    reg_scale = int(p.get("reg_scale", 1000))
+    # Interpret value as percent unless caller supplies volts explicitly via 'unit' == "V" and 'raw' field
+    unit = p.get("unit", "").upper()
+    if unit == "V" and p.get("kind","").lower() != "percent":
+        return lambda value: dev.voltage_register(ch, value, reg_scale)
+    return lambda value: dev.percent_register(ch, value, reg_scale)
+
+
+def _percent_encoder(dev, p: dict) -> Callable[[float], Optional[tuple[int, int]]]:
+    """Builds the register encoder for percent-commanded devices (PPS, Pump)."""
+    return dev.percent_register
+
+
+# Device kinds polled by the DAQ loop, and register-encoder builders keyed by device kind.
+# An encoder maps a command value to (holding address, raw value), or None if it cannot be written.
+_DAQ_KINDS = frozenset({"AI", "TDA"})
+_ENCODERS: dict[str, Callable[[Any, dict], Callable[[float], Optional[tuple[int, int]]]]] = {
+    "AO": _ao_encoder,
+    "PPS": _percent_encoder,
+    "PUMP": _percent_encoder,
+}
+
+DaqBlock = tuple[str, Callable[[int, int], Optional[list]], int, int, tuple[tuple[str, int, float, float], ...]]
+
+
 class HAL:
     """
     The Hardware Abstraction Layer (HAL) that manages communication with devices via Modbus.
@@ -34,12 +64,13 @@ class HAL:
         buses (dict[str, ModbusBus]): A dictionary of Modbus buses keyed by bus name.
         devices (dict): A dictionary of devices created from the configuration.
         tags (dict): A mapping of tag names to device channels.
-        data (dict): A live data store for storing the current values, timestamps, and quality of tags.
-        data_lock (threading.Lock): A lock for thread-safe access to `data`.
-        write_q (queue.Queue): A queue for holding write commands to be processed by the control loop.
+        _tag_idx (dict[str, int]): Index of each tag into the live data store below.
+        _live (list[TagValue | None]): Latest record per tag (None until first update).
+        write_q (queue.Queue): A queue of {tag: value} write batches to be processed by the control loop.
         _stop (threading.Event): An event used to signal the stopping of threads.
-        t_daq (threading.Thread): The data acquisition thread.
+        t_daq (dict[str, threading.Thread]): One data acquisition thread per bus with input devices.
         t_ctl (threading.Thread): The control loop thread.
+        poll_period_s (float): DAQ scan period in seconds; a snapshot is at most this old.
     """
     
     def __init__(self, plant_path="config/plant.yaml"):
@@ -50,6 +81,7 @@ class HAL:
             plant_path (str): Path to the plant configuration YAML file (default is "config/plant.yaml").
         """
         self.cfg = PlantConfig(plant_path)
+        self.poll_period_s = 0.2
 
         # Build buses from configuration
         self.buses: dict[str, ModbusBus] = {}
@@ -57,29 +89,79 @@ class HAL:
             spec = BusSpec(
                 port=p["port"], baud=p.get("baud",9600), parity=p.get("parity","N"),
                 stopbits=p.get("stopbits",1), bytesize=p.get("bytesize",8),
-                timeout_ms=p.get("timeout_ms", p.get("timeout",200))
+                timeout_ms=p.get("timeout_ms", p.get("timeout",200)),
+                cache_ttl_ms=p.get("cache_ttl_ms", 50)
             )
-            self.buses[bus_name] = ModbusBus(bus_name, spec)
+            self.buses[bus_name] = ModbusBus(bus_name, spec, fast_path=bool(p.get("fast_path", False)))
 
         # Attach devices to their buses
         self.devices = {}
         for name, d in self.cfg.devices.items():
             bus = self.buses[d["bus"]]
             self.devices[name] = make_device(name, d, bus)
+            if d.get("no_cache"):  # readings must always come from the line
+                bus.no_cache_units.add(self.devices[name].unit)
 
-        # Mapping tag -> (device_name, point_cfg)
-        self.tags = self.cfg.points
+        # Mapping tag -> (device_name, point_cfg); tag names are interned so lookups with
+        # literal tag names (e.g. write("heater_cmd", ...)) hit the identity fast path
+        self.tags = {sys.intern(tag): p for tag, p in self.cfg.points.items()}
 
-        # Live data store for tags
-        self.data: Dict[str, TagValue] = {}
-        self.data_lock = threading.Lock()
+        # Precomputed per-tag plans (config is invariant after load, so resolve it once here)
+        daq_points: dict[str, list[tuple[str, int, float, float]]] = {}
+        bad_points: list[str] = []  # input tags whose channel is missing or out of range
+        self._ctl_plan: dict[str, Optional[tuple[Any, Callable[[float], Optional[tuple[int, int]]]]]] = {}
+        for tag, p in self.tags.items():
+            dev_name = p.get("device")
+            if not dev_name:
+                continue
+            dev = self.devices.get(dev_name)
+            if dev is None:
+                logger.warning(f"Tag '{tag}' refers to unknown device '{dev_name}'; ignored.")
+                continue
+            if dev.kind in _DAQ_KINDS:
+                # Checked once here so a bad point is left out of its device's block read
+                # instead of failing the whole block on every scan
+                try:
+                    ch = int(p["channel"])
+                except (KeyError, TypeError, ValueError):
+                    ch = None
+                if ch is None or not dev.valid_channel(ch):
+                    logger.warning(f"Tag '{tag}': channel {p.get('channel')!r} is not valid for {dev_name}; marked Bad.")
+                    bad_points.append(tag)
+                else:
+                    scale = p["scale"]  # normalized by PlantConfig
+                    daq_points.setdefault(dev_name, []).append((tag, ch, scale["gain"], scale["offset"]))
+            self._ctl_plan[tag] = self._resolve_encoder(dev, p)
+
+        # Buses are independent serial lines, so each one gets its own DAQ plan and thread
+        self._daq_plan_by_bus: dict[str, list[DaqBlock]] = {}
+        for block in self._plan_block_reads(daq_points):
+            bus_name = self.devices[block[0]].bus.name
+            self._daq_plan_by_bus.setdefault(bus_name, []).append(block)
+        self._bus_bad: dict[str, bool] = dict.fromkeys(self._daq_plan_by_bus, False)
+        self._overruns: dict[str, int] = dict.fromkeys(self._daq_plan_by_bus, 0)
 
-        # Writer queue (tag, value) for control commands
-        self.write_q: queue.Queue[tuple[str, float]] = queue.Queue()
+        # Live data store for tags: one immutable TagValue per slot, indexed by tag. An update
+        # replaces the whole record in one list store, so readers never see a value from one
+        # update paired with the quality of another, and nobody needs a lock.
+        # Besides the configured points, "overrun_count" reports DAQ scans that missed their deadline.
+        tag_names = dict.fromkeys([*self.tags, "overrun_count"])
+        self._tag_idx: dict[str, int] = {tag: i for i, tag in enumerate(tag_names)}
+        n_tags = len(self._tag_idx)
+        self._live: list[TagValue | None] = [None] * n_tags
+        self._set_tag("overrun_count", 0.0, "Good")
+        for tag in bad_points:
+            self._set_tag(tag, None, "Bad")
+
+        # Writer queue of {tag: value} batches for control commands; None asks the control loop to exit
+        self.write_q: queue.Queue[dict[str, float] | None] = queue.Queue()
 
         # Threads for data acquisition and control
         self._stop = threading.Event()
-        self.t_daq = threading.Thread(target=self._daq_loop, name="HAL-DAQ", daemon=True)
+        self.t_daq: dict[str, threading.Thread] = {
+            bn: threading.Thread(target=self._daq_loop, args=(bn,), name=f"HAL-DAQ-{bn}", daemon=True)
+            for bn in self._daq_plan_by_bus
+        }
         self.t_ctl = threading.Thread(target=self._ctl_loop, name="HAL-CTL", daemon=True)
 
     # --- lifecycle ---    
@@ -87,9 +169,9 @@ class HAL:
         """
         Starts the HAL system, opening Modbus buses and starting the data acquisition and control threads.
         """
-        for b in self.buses.values():
-            b.open()
-        self.t_daq.start()
+        self._for_each_bus(lambda b: b.open())
+        for t in self.t_daq.values():
+            t.start()
         self.t_ctl.start()
         logger.info("HAL started.")
 
@@ -98,22 +180,34 @@ class HAL:
         Stops the HAL system, closing Modbus buses and stopping the threads.
         """
         self._stop.set()
-        self.t_daq.join(timeout=1.0)
+        self.write_q.put(None)  # wake-up sentinel for the control loop
+        for t in self.t_daq.values():
+            t.join(timeout=1.0)
         self.t_ctl.join(timeout=1.0)
-        for b in self.buses.values():
-            b.close()
+        self._for_each_bus(lambda b: b.close())
         logger.info("HAL stopped.")
 
+    def _for_each_bus(self, fn: Callable[[ModbusBus], Any]):
+        """
+        Applies fn to every bus concurrently, so slow serial open/close calls overlap.
+
+        Args:
+            fn (Callable): The operation to run on each bus.
+        """
+        with ThreadPoolExecutor(max_workers=max(1, len(self.buses))) as ex:
+            list(ex.map(fn, self.buses.values()))
+
     # --- public API ---    
     def snapshot(self) -> dict[str, dict]:
         """
         Returns a snapshot of the current data for all tags.
 
         Returns:
-            dict: A dictionary containing the current value, timestamp, and quality of each tag.
+            dict: A dictionary containing the current value, timestamp, and quality of each tag
+            that has been updated at least once.
         """
-        with self.data_lock:
-            return {k: {"value": v.value, "ts": v.ts, "quality": v.quality} for k, v in self.data.items()}
+        return {k: {"value": tv.value, "ts": tv.ts, "quality": tv.quality}
+                for k, tv in zip(self._tag_idx, self._live) if tv is not None}
 
     def write(self, tag: str, value: float):
         """
@@ -123,10 +217,22 @@ class HAL:
             tag (str): The tag to write to (e.g., "T_hot", "P_shell").
             value (float): The value to write to the tag.
         """
-        self.write_q.put((tag, float(value)))
+        self.write_q.put({tag: float(value)})
+
+    def write_many(self, tag_to_value: dict[str, float]):
+        """
+        Queues several write commands to be applied together.
+
+        Commands that land on consecutive holding registers of the same device are sent as
+        one multi-register write (FC16) instead of one frame per tag.
+
+        Args:
+            tag_to_value (dict): The value to write per tag.
+        """
+        self.write_q.put({tag: float(v) for tag, v in tag_to_value.items()})
 
     # --- internals ---    
-    def _set_tag(self, tag: str, value: float | None, q: str):
+    def _set_tag(self, tag: str, value: float | None, q: str, now: float | None = None):
         """
         Sets the value, timestamp, and quality for a tag in the live data store.
 
@@ -134,85 +240,176 @@ class HAL:
             tag (str): The tag to update.
             value (float | None): The value to set, or None if the value is unavailable.
             q (str): The quality of the data ("Good", "Bad", "Unknown").
+            now (float | None): Timestamp to record; defaults to the current time.
+        """
+        self._live[self._tag_idx[tag]] = TagValue(value, now if now is not None else time.time(), q)
+
+    # Widest channel span fetched in one block read; wider groups fall back to per-channel reads
+    MAX_BLOCK_SPAN = 32
+
+    def _plan_block_reads(self, points_by_dev: dict[str, list[tuple[str, int, float, float]]]) -> list[DaqBlock]:
         """
-        with self.data_lock:
-            self.data[tag] = TagValue(value=value, ts=time.time(), quality=q)
+        Groups the input points of each device into block reads covering their channel span.
 
-    def _daq_loop(self):
+        Args:
+            points_by_dev (dict): Device name -> list of (tag, channel, gain, offset).
+
+        Returns:
+            list: Entries of (device_name, read_block, first_ch, n, points), where each point is
+            (tag, index into the block, gain, offset).
         """
-        The data acquisition loop. Periodically reads data from AI/TDA devices and updates the tag values.
+        plan: list[DaqBlock] = []
+        for dev_name, pts in points_by_dev.items():
+            read_block = self.devices[dev_name].read_block
+            chans = [ch for _, ch, _, _ in pts]
+            first, last = min(chans), max(chans)
+            if last - first < self.MAX_BLOCK_SPAN:
+                plan.append((dev_name, read_block, first, last - first + 1,
+                             tuple((tag, ch - first, gain, offset) for tag, ch, gain, offset in pts)))
+            else:
+                for tag, ch, gain, offset in pts:
+                    plan.append((dev_name, read_block, ch, 1, ((tag, 0, gain, offset),)))
+        return plan
+
+    @staticmethod
+    def _resolve_encoder(dev, p: dict) -> Optional[tuple[Any, Callable[[float], Optional[tuple[int, int]]]]]:
         """
-        period = 0.2  # seconds
+        Builds the register encoder for an actuator tag based on its device type.
+
+        Args:
+            dev: The device the tag maps to.
+            p (dict): The point configuration.
+
+        Returns:
+            tuple | None: The device and a function mapping the command value to
+            (address, raw), or None if the device is not writable.
+        """
+        build = _ENCODERS.get(dev.kind)
+        return None if build is None else (dev, build(dev, p))
+
+    def _daq_loop(self, bus_name: str):
+        """
+        The data acquisition loop for one bus. Periodically reads data from its AI/TDA devices and
+        updates the tag values.
+
+        Args:
+            bus_name (str): The bus whose devices this loop polls.
+        """
+        plan = self._daq_plan_by_bus[bus_name]
+        # Bind hot-path callables once (local lookups instead of global/attribute lookups)
+        _set_tag = self._set_tag
+        _log_debug = logger.debug
+        _log_warning = logger.warning
+        period = self.poll_period_s
+        next_t = time.monotonic()
         while not self._stop.is_set():
+            t0 = time.monotonic()
             any_bad = False
-            for tag, p in self.tags.items():
-                dev_name = p.get("device")
-                if not dev_name:
-                    continue
-                dev = self.devices[dev_name]
+            now = time.time()  # one timestamp shared by all tags of this scan
+            for dev_name, read_block, first, n, points in plan:
                 try:
-                    if isinstance(dev, (AI, TDA)):
-                        ch = int(p.get("channel", 0))
-                        raw = dev.read_channel(ch)
-                        if raw is None:
-                            self._set_tag(tag, None, "Bad"); any_bad = True; continue
-                        # Optional linear scale
-                        scale = p.get("scale", {})
-                        gain = scale.get("gain", 1.0) if isinstance(scale, dict) else float(scale or 1.0)
-                        offset = scale.get("offset", 0.0) if isinstance(scale, dict) else 0.0
-                        val = raw * gain + offset
-                        self._set_tag(tag, val, "Good")
-                    else:
-                        # Actuator tag; skip in DAQ loop
-                        continue
+                    regs = read_block(first, n)
+                    if regs is None or len(regs) < n:
+                        regs = None
                 except Exception as e:
+                    regs = None
+                    _log_debug("DAQ error @ {}: {}", dev_name, e)
+                if regs is None:
                     any_bad = True
-                    self._set_tag(tag, None, "Bad")
-                    logger.debug(f"DAQ error @ {tag}: {e}")
+                    for tag, _, _, _ in points:
+                        _set_tag(tag, None, "Bad", now)
+                    continue
+                # Optional linear scale
+                for tag, i, gain, offset in points:
+                    _set_tag(tag, regs[i] * gain + offset, "Good", now)
 
-            # update computed comm_bad if present
+            # update computed comm_bad if present (bad if any bus had a failed read in its last scan)
+            self._bus_bad[bus_name] = any_bad
             if "comm_bad" in self.tags:
-                self._set_tag("comm_bad", 1.0 if any_bad else 0.0, "Good")
+                _set_tag("comm_bad", 1.0 if any(self._bus_bad.values()) else 0.0, "Good", now)
 
-            time.sleep(period)
+            # Fixed-rate schedule on monotonic deadlines; waiting on _stop lets stop() wake us at once
+            next_t += period
+            t1 = time.monotonic()
+            dt = next_t - t1
+            if dt <= 0:
+                # Overrun: report it and skip the missed slot(s) instead of scanning back-to-back,
+                # so a stalled device does not keep the bus saturated
+                _log_warning(f"[{bus_name}] DAQ overrun {(t1 - t0)*1000:.0f}ms > {period*1000:.0f}ms")
+                self._overruns[bus_name] += 1
+                _set_tag("overrun_count", float(sum(self._overruns.values())), "Good")
+                next_t += (int(-dt // period) + 1) * period
+                dt = next_t - t1
+            self._stop.wait(dt)
 
     def _ctl_loop(self):
         """
-        The control loop. Consumes write commands from the queue and dispatches them to the appropriate devices.
+        The control loop. Consumes write batches from the queue and dispatches them to the appropriate devices.
         """
-        while not self._stop.is_set():
-            try:
-                tag, value = self.write_q.get(timeout=0.1)
-            except queue.Empty:
-                continue
+        while True:
+            # Block until a command arrives; stop() enqueues a sentinel to wake us
+            batch = self.write_q.get()
+            if batch is None:
+                break
+            self._apply_writes(batch)
 
-            p = self.tags.get(tag, {})
-            dev_name = p.get("device")
-            if not dev_name:
-                logger.warning(f"Write to logic/unknown tag '{tag}' ignored.")
+    def _apply_writes(self, batch: dict[str, float]):
+        """
+        Encodes a batch of tag writes and sends them, one frame per run of consecutive
+        registers on the same device (FC6 for a single register, FC16 otherwise).
+
+        Args:
+            batch (dict): The value to write per tag.
+        """
+        # Bind hot-path callables once (local lookups instead of global/attribute lookups)
+        _set_tag = self._set_tag
+        _log_debug = logger.debug
+        _log_warning = logger.warning
+
+        # (bus, unit) -> [(address, raw, tag, value)]
+        pending: dict[tuple[ModbusBus, int], list[tuple[int, int, str, float]]] = {}
+        for tag, value in batch.items():
+            if tag not in self._ctl_plan:
+                _log_warning(f"Write to logic/unknown tag '{tag}' ignored.")
                 continue
-            dev = self.devices[dev_name]
+            entry = self._ctl_plan[tag]
+            if entry is None:
+                _log_warning(f"Tag '{tag}' maps to non-writable device type.")
+                _set_tag(tag, None, "Bad")
+                _log_warning(f"Write failed: {tag} -> {value}")
+                continue
+            dev, encode = entry
             try:
-                ok = False
-                # Dispatch based on device type
-                if isinstance(dev, AO):
-                    ch = int(p.get("channel", 1))
-                    reg_scale = int(p.get("reg_scale", 1000))
-                    # Interpret value as percent unless caller supplies volts explicitly via 'unit' == "V" and 'raw' field
-                    unit = p.get("unit", "").upper()
-                    if unit == "V" and p.get("kind","").lower() != "percent":
-                        ok = dev.write_voltage_fixed3(ch, float(value), reg_scale)
+                reg = encode(value)
+            except Exception as e:
+                _set_tag(tag, None, "Bad")
+                _log_debug("Write error @ {}: {}", tag, e)
+                continue
+            if reg is None:
+                _set_tag(tag, None, "Bad")
+                _log_warning(f"Write failed: {tag} -> {value}")
+                continue
+            pending.setdefault((dev.bus, dev.unit), []).append((reg[0], reg[1], tag, value))
+
+        for (bus, unit), regs in pending.items():
+            regs.sort(key=lambda r: r[0])
+            i = 0
+            while i < len(regs):
+                # Extend the run while addresses are consecutive
+                j = i + 1
+                while j < len(regs) and regs[j][0] == regs[j - 1][0] + 1:
+                    j += 1
+                run = regs[i:j]
+                try:
+                    if len(run) == 1:
+                        ok = bus.write_holding(unit, run[0][0], run[0][1])
                     else:
-                        ok = dev.write_percent_to_0_10v(ch, float(value), reg_scale)
-                elif isinstance(dev, (PPS, Pump)):
-                    ok = dev.write_percent(float(value))
-                else:
-                    logger.warning(f"Tag '{tag}' maps to non-writable device type.")
+                        ok = bus.write_holding_block(unit, run[0][0], [raw for _, raw, _, _ in run])
+                except Exception as e:
                     ok = False
-
-                self._set_tag(tag, float(value) if ok else None, "Good" if ok else "Bad")
-                if not ok:
-                    logger.warning(f"Write failed: {tag} -> {value}")
-            except Exception as e:
-                self._set_tag(tag, None, "Bad")
-                logger.debug(f"Write error @ {tag}: {e}")
+                    _log_debug("Write error @ {}: {}", ", ".join(t for _, _, t, _ in run), e)
+                for _, _, tag, value in run:
+                    _set_tag(tag, value if ok else None, "Good" if ok else "Bad")
+                    if not ok:
+                        _log_warning(f"Write failed: {tag} -> {value}")
+                i = j
@@ -1,16 +1,35 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Optional, List
-from time import sleep
+from array import array
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, replace
+from queue import Empty, SimpleQueue
+from functools import cache
+from typing import TYPE_CHECKING, Optional, List
+import os
+import random
+import select
+import sys
+import threading
+from time import monotonic, sleep
 from loguru import logger
-import inspect
 
-try:
-    from pymodbus.client import ModbusSerialClient  # pymodbus 3.x+
-    PM_VER = "3.x+"
-except Exception:  # pragma: no cover
-    from pymodbus.client.sync import ModbusSerialClient  # pymodbus 2.x
-    PM_VER = "2.x"
+from hal.modbus_rtu import FC_READ_HOLDING, FC_READ_INPUT, encode_read, decode_read, expected_len, warm_up
+
+_CO_VARKEYWORDS = 0x08  # code.co_flags bit for **kwargs (inspect.CO_VARKEYWORDS)
+
+if TYPE_CHECKING:
+    from pymodbus.client import ModbusSerialClient
+
+
+@cache
+def _client_class() -> tuple[type, str]:
+    """(ModbusSerialClient, pymodbus version tag); resolved on first open, not at import."""
+    try:
+        from pymodbus.client import ModbusSerialClient  # pymodbus 3.x+
+        return ModbusSerialClient, "3.x+"
+    except Exception:  # pragma: no cover
+        from pymodbus.client.sync import ModbusSerialClient  # pymodbus 2.x
+        return ModbusSerialClient, "2.x"
 
 
 @dataclass
@@ -21,20 +40,67 @@ class BusSpec:
     stopbits: int = 1
     bytesize: int = 8
     timeout_ms: int = 200
+    # Reads of the same span within this window are answered from cache (0 disables)
+    cache_ttl_ms: int = 50
+
+
+def _specialize(fn, arg: str, kw: Optional[str]):
+    """
+    Build ``call(address, x, unit)`` for a client method, passing ``x`` as ``arg`` and the
+    unit id as ``kw`` (positional, 2.x style, when ``kw`` is None). Generated once per
+    open() so each I/O is a single call without building a kwargs dict.
+    """
+    if fn is None or kw is None:
+        return fn
+    ns = {"fn": fn}
+    exec(f"def call(address, x, unit):\n    return fn(address=address, {arg}=x, {kw}=unit)\n", ns)
+    return ns["call"]
 
 
 class ModbusBus:
-    def __init__(self, name: str, spec: BusSpec):
+    # Largest register count a single FC3/FC4 request may carry
+    MAX_READ_REGS = 125
+    # Window during which the I/O thread gathers further requests to coalesce with the first
+    IO_GATHER_S = 0.001
+
+    def __init__(self, name: str, spec: BusSpec, fast_path: bool = False):
         self.name = name
         self.spec = spec
+        # fast_path: serve register reads with the built-in RTU codec straight on the serial
+        # port instead of going through pymodbus (writes always use pymodbus)
+        self.fast_path = fast_path
+        if fast_path:
+            warm_up()  # optional CRC accelerator: pay its import/compile at setup, not mid-poll
+        self._pdu_cache: dict[tuple[int, int, int, int], bytes] = {}  # (unit, fc, addr, count) -> request frame
+        self._rx_buf = bytearray(256)
+        self._rx_regs = array("H")
+        self._rx_fd: Optional[int] = None  # POSIX fd of the serial port, for select()/os.read()
+        # End of the last exchange on the line; the next request waits out the RTU inter-frame
+        # silence from here (pymodbus cannot see fast-path traffic, so both paths record it)
+        self._last_frame_end = 0.0
+        # Read result cache: (which, unit, addr, count) -> (monotonic time, registers).
+        # Only touched from the I/O thread (or inline when it is not running).
+        self._read_cache: dict[tuple[str, int, int, int], tuple[float, array]] = {}
+        # Units whose reads must always hit the line (e.g. fast-changing inputs)
+        self.no_cache_units: set[int] = set()
         self.client: Optional[ModbusSerialClient] = None
         self.ok: bool = False
         self._addr_kw: Optional[str] = None  # "unit", "slave" or "device_id"
+        self._last_spec: Optional[BusSpec] = None  # spec of the current live connection
+        # Client calls specialized to the detected keyword, bound in open()
+        self._read_holding = None
+        self._read_input = None
+        self._write_register = None
+        self._write_registers = None
+        # Dedicated I/O thread: all transactions on this bus go through its queue
+        self._io_q: SimpleQueue = SimpleQueue()
+        self._io_thread: Optional[threading.Thread] = None
 
     # --- connection management ---
     def _build_client(self) -> ModbusSerialClient:
         timeout_s = max(self.spec.timeout_ms, 50) / 1000.0
-        client = ModbusSerialClient(
+        client_cls, _ = _client_class()
+        client = client_cls(
             port=self.spec.port,
             baudrate=self.spec.baud,
             bytesize=self.spec.bytesize,
@@ -46,6 +112,14 @@ class ModbusBus:
         return client
 
     def open(self) -> bool:
+        # Reuse a live connection: re-opening a (USB-)serial port is slow and may drop a working link
+        if self.client is not None and self.ok and self.spec == self._last_spec and self._socket_open():
+            # Cheap, and restores keyword bindings a positional fallback may have replaced
+            self._detect_addr_kw()
+            self._bind_calls()
+            self._start_io()
+            return True
+
         if self.client is not None:
             try:
                 self.client.close()
@@ -59,14 +133,45 @@ class ModbusBus:
             logger.error(f"[{self.name}] connect error on {self.spec.port}: {e}")
             self.ok = False
 
-        logger.info(f"[{self.name}] open {self.spec.port} (pymodbus {PM_VER}) -> {self.ok}")
+        logger.info(f"[{self.name}] open {self.spec.port} (pymodbus {_client_class()[1]}) -> {self.ok}")
 
         if self.ok:
+            self._tune_port()
             self._detect_addr_kw()
+            self._bind_calls()
+            self._last_spec = replace(self.spec)
 
+        self._start_io()
         return self.ok
 
+    def _tune_port(self):
+        """
+        Best-effort serial tuning after connect: set the read timeout and, on Linux, switch
+        USB-serial adapters to low-latency mode (FTDI otherwise holds bytes for ~16 ms).
+        """
+        self._rx_fd = None
+        ser = getattr(self.client, "socket", None)
+        if ser is None:
+            return
+        try:
+            ser.timeout = max(self.spec.timeout_ms, 50) / 1000.0
+        except Exception:
+            pass
+        if sys.platform.startswith("linux"):
+            try:
+                ser.set_low_latency_mode(True)  # TIOCGSERIAL/TIOCSSERIAL with ASYNC_LOW_LATENCY
+            except Exception as e:
+                logger.debug("[{}] low-latency mode not available: {}", self.name, e)
+        if os.name == "posix":
+            try:
+                self._rx_fd = ser.fileno()
+            except Exception:
+                self._rx_fd = None
+
     def close(self):
+        self._stop_io()
+        self._read_cache.clear()
+        self._rx_fd = None
         if self.client is not None:
             try:
                 self.client.close()
@@ -74,7 +179,124 @@ class ModbusBus:
                 pass
         self.ok = False
 
+    # --- I/O thread ---
+    # Callers submit requests and wait on a Future; the I/O thread serializes transactions on
+    # the line and, within one gather window, merges reads of the same unit into single
+    # requests (identical or overlapping/adjacent spans are fetched once).
+    def _start_io(self):
+        if self._io_thread is not None and self._io_thread.is_alive():
+            return
+        self._io_q = SimpleQueue()
+        self._io_thread = threading.Thread(target=self._io_loop, name=f"BUS-IO-{self.name}", daemon=True)
+        self._io_thread.start()
+
+    def _stop_io(self):
+        t = self._io_thread
+        if t is None:
+            return
+        self._io_q.put(None)
+        t.join(timeout=1.0)
+        self._io_thread = None
+
+    def _submit(self, key: Optional[tuple], fn, *args, failed=None):
+        """
+        Run ``fn(*args)`` on the I/O thread and wait for its result. Reads pass their
+        ``(which, unit, address, count)`` as ``key`` so they can be coalesced.
+        Runs inline when there is no I/O thread (bus not opened) or when called from it.
+
+        A request not started within the wait is cancelled, so it never reaches the line
+        after its caller was told it failed; ``failed`` is returned in that case.
+        """
+        t = self._io_thread
+        if t is None or threading.current_thread() is t:
+            return self._call_read(*key) if key is not None else fn(*args)
+        fut: Future = Future()
+        self._io_q.put((key, fn, args, fut))
+        wait_s = max(1.0, 5 * self.spec.timeout_ms / 1000.0)
+        try:
+            return fut.result(timeout=wait_s)
+        except FutureTimeout:
+            if fut.cancel():
+                logger.warning(f"[{self.name}] I/O request not served in time; cancelled")
+                return failed
+        # Already on the line: its outcome is what actually happened, so wait for it
+        try:
+            return fut.result(timeout=wait_s)
+        except FutureTimeout:
+            logger.warning(f"[{self.name}] I/O request still running after {2 * wait_s:.1f}s")
+            return failed
+
+    def _io_loop(self):
+        q = self._io_q
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            end = monotonic() + self.IO_GATHER_S
+            while (left := end - monotonic()) > 0:
+                try:
+                    item = q.get(timeout=left)
+                except Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._run_batch(batch)
+            if stopping:
+                return
+
+    def _run_batch(self, batch: list):
+        # Keep submission order between reads and other operations; only runs of reads are merged
+        reads = []
+        for item in batch:
+            key, fn, args, fut = item
+            if key is not None:
+                reads.append(item)
+                continue
+            self._flush_reads(reads)
+            reads = []
+            if not fut.set_running_or_notify_cancel():
+                continue  # caller gave up waiting
+            try:
+                fut.set_result(fn(*args))
+            except Exception as e:
+                fut.set_exception(e)
+        self._flush_reads(reads)
+
+    def _flush_reads(self, reads: list):
+        # (which, unit) -> {(address, count): [futures]}
+        groups: dict[tuple[str, int], dict[tuple[int, int], List[Future]]] = {}
+        for (which, unit, address, count), _, _, fut in reads:
+            if not fut.set_running_or_notify_cancel():
+                continue  # caller gave up waiting
+            groups.setdefault((which, unit), {}).setdefault((address, count), []).append(fut)
+        for (which, unit), spans in groups.items():
+            try:
+                res = self._read_spans(which, unit, list(spans), gap_tolerance=0)
+            except Exception as e:
+                for futs in spans.values():
+                    for fut in futs:
+                        fut.set_exception(e)
+                continue
+            for span, futs in spans.items():
+                regs = res.get(span)
+                for fut in futs:
+                    fut.set_result(None if regs is None else regs[:])  # own copy per caller
+
     # --- helpers ---
+    def _socket_open(self) -> bool:
+        """Cheap liveness check of the current client (pymodbus 3.x ``is_socket_open``)."""
+        is_open = getattr(self.client, "is_socket_open", None)
+        if is_open is None:
+            return True  # 2.x: nothing cheaper to ask, trust self.ok
+        try:
+            return bool(is_open())
+        except Exception:
+            return False
+
     def _detect_addr_kw(self):
         """
         Detect which keyword the client expects for the unit id.
@@ -85,100 +307,293 @@ class ModbusBus:
             self._addr_kw = None
             return
 
+        # Read the parameter names straight off the code object (a tuple read, unlike inspect.signature)
+        code = getattr(getattr(fn, "__wrapped__", fn), "__code__", None)
+        if code is None:
+            self._addr_kw = "slave"  # pymodbus 3.x default
+            return
+        names = code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+        for cand in ("device_id", "slave", "unit"):
+            if cand in names:
+                self._addr_kw = cand
+                return
+        # 2.x takes the unit id through **kwargs
+        self._addr_kw = "unit" if code.co_flags & _CO_VARKEYWORDS else None
+
+    def _bind_calls(self):
+        """Resolve the client's register methods once, specialized to ``_addr_kw``."""
+        c = self.client
+        self._read_holding = _specialize(getattr(c, "read_holding_registers", None), "count", self._addr_kw)
+        self._read_input = _specialize(getattr(c, "read_input_registers", None), "count", self._addr_kw)
+        self._write_register = _specialize(getattr(c, "write_register", None), "value", self._addr_kw)
+        self._write_registers = _specialize(getattr(c, "write_registers", None), "values", self._addr_kw)
+
+    def _retry_positional(self, fn_name: str, e: Exception, address: int, x, unit: int):
+        """
+        Retry one call positionally after a TypeError from a keyword call; returns the
+        response, or None if the retry failed too. Only a successful positional call switches
+        the bindings to positional, so a stray TypeError cannot break a keyword-only client.
+        """
+        fn = getattr(self.client, fn_name, None)
+        if self._addr_kw is None or fn is None:
+            logger.debug("[{}] {} positional error: {}", self.name, fn_name, e)
+            return None
+        logger.debug("[{}] {} kw call failed ({}), retrying positional.", self.name, fn_name, e)
         try:
-            sig = inspect.signature(fn)
-            for cand in ("unit", "slave", "device_id"):
-                if cand in sig.parameters:
-                    self._addr_kw = cand
-                    break
-        except Exception:
-            self._addr_kw = "unit"
+            rr = fn(address, x, unit)
+        except Exception as e2:
+            logger.debug("[{}] {} positional error: {}", self.name, fn_name, e2)
+            return None
+        if rr and getattr(rr, "isError", lambda: True)() is False:
+            logger.debug("[{}] {} positional call works, switching to positional.", self.name, fn_name)
+            self._addr_kw = None
+            self._bind_calls()
+        return rr
 
-    def _call_read(self, which: str, unit: int, address: int, count: int = 1) -> Optional[List[int]]:
+    def _call_read(self, which: str, unit: int, address: int, count: int = 1) -> Optional[array]:
+        ttl = self.spec.cache_ttl_ms / 1000.0
+        if ttl <= 0 or unit in self.no_cache_units:
+            return self._read_uncached(which, unit, address, count)
+
+        key = (which, unit, address, count)
+        now = monotonic()
+        hit = self._read_cache.get(key)
+        if hit is not None and now - hit[0] < ttl:
+            return hit[1][:]  # copy: callers may modify what they get
+        regs = self._read_uncached(which, unit, address, count)
+        if regs is None:
+            self._read_cache.pop(key, None)
+        else:
+            self._read_cache[key] = (now, regs[:])
+        return regs
+
+    def _invalidate_cache(self, unit: int, address: int, count: int):
+        """Drop cached holding-register reads of ``unit`` overlapping [address, address+count)."""
+        end = address + count
+        stale = [k for k in self._read_cache
+                 if k[0] == "holding" and k[1] == unit and k[2] < end and address < k[2] + k[3]]
+        for k in stale:
+            del self._read_cache[k]
+
+    def _read_uncached(self, which: str, unit: int, address: int, count: int = 1) -> Optional[array]:
         if not self.ok or self.client is None:
             return None
 
-        fn_name = "read_input_registers" if which == "input" else "read_holding_registers"
-        fn = getattr(self.client, fn_name, None)
-        if fn is None:
+        if self.fast_path:
+            ser = getattr(self.client, "socket", None)
+            if ser is not None:
+                return self._fast_read(ser, which, unit, address, count)
+
+        if which == "input":
+            fn_name, call = "read_input_registers", self._read_input
+        else:
+            fn_name, call = "read_holding_registers", self._read_holding
+        if call is None:
             logger.error(f"[{self.name}] client has no {fn_name}")
             return None
 
-        # First try keyword-based call
-        if self._addr_kw:
-            kwargs = {"address": address, "count": count, self._addr_kw: unit}
-            try:
-                rr = fn(**kwargs)
-            except TypeError as e:
-                logger.debug(f"[{self.name}] {fn_name} kw call failed ({e}), retrying positional.")
-                rr = None
-            except Exception as e:
-                logger.debug(f"[{self.name}] {fn_name} error: {e}")
-                return None
-        else:
-            rr = None
+        self._wait_silence()
+        try:
+            rr = call(address, count, unit)
+        except TypeError as e:
+            rr = self._retry_positional(fn_name, e, address, count, unit)
+        except Exception as e:
+            logger.debug("[{}] {} error: {}", self.name, fn_name, e)
+            return None
+        finally:
+            self._last_frame_end = monotonic()
 
-        # Fallback to positional (old 2.x style)
-        if rr is None:
-            try:
-                rr = fn(address, count, unit)
-            except Exception as e:
-                logger.debug(f"[{self.name}] {fn_name} positional error: {e}")
+        if not rr or getattr(rr, "isError", lambda: True)():
+            return None
+
+        regs = getattr(rr, "registers", None)
+        return None if regs is None else array("H", regs)
+
+    def _fast_read(self, ser, which: str, unit: int, address: int, count: int) -> Optional[array]:
+        """Read registers with the raw RTU codec directly on the pyserial port."""
+        fc = FC_READ_INPUT if which == "input" else FC_READ_HOLDING
+        n = expected_len(fc, count)
+        rx = memoryview(self._rx_buf)
+        try:
+            # Polls repeat the same few request shapes, so each frame (CRC included) is encoded once
+            key = (unit, fc, address, count)
+            frame = self._pdu_cache.get(key)
+            if frame is None:
+                buf = bytearray(8)
+                encode_read(buf, unit, fc, address, count)
+                frame = self._pdu_cache[key] = bytes(buf)
+            ser.reset_input_buffer()  # drop any stale bytes from an earlier, timed-out exchange
+            self._wait_silence()
+            ser.write(frame)
+            deadline = monotonic() + max(self.spec.timeout_ms, 50) / 1000.0
+            # The shortest reply is a 5-byte exception frame; only read the rest for a normal reply
+            got = self._recv_into(ser, rx[:5], deadline)
+            if got < 5:
                 return None
+            if not rx[1] & 0x80:
+                got += self._recv_into(ser, rx[5:n], deadline)
+        except Exception as e:
+            logger.debug("[{}] fast read error: {}", self.name, e)
+            return None
+        finally:
+            self._last_frame_end = monotonic()
 
-        if not rr or getattr(rr, "isError", lambda: True)():
+        if decode_read(rx, got, unit, fc, self._rx_regs) != count:
             return None
+        return self._rx_regs[:]  # copy: _rx_regs is reused by the next read
 
-        return getattr(rr, "registers", None)
+    def _wait_silence(self):
+        """Sleep out the rest of the 3.5-character RTU inter-frame gap (>= 1.75 ms) since the last exchange."""
+        gap = max(3.5 * 11 / self.spec.baud, 0.00175)  # 11 bits per character on the wire
+        left = self._last_frame_end + gap - monotonic()
+        if left > 0:
+            sleep(left)
 
-    def _call_write(self, unit: int, address: int, value: int) -> bool:
-        if not self.ok or self.client is None:
-            return False
+    def _recv_into(self, ser, buf: memoryview, deadline: float) -> int:
+        """
+        Fill ``buf`` (a view into the receive buffer) before ``deadline``; returns the byte
+        count received. On POSIX this waits with select() and reads with os.readv() straight
+        into the buffer instead of going through pyserial's read loop.
+        """
+        fd = self._rx_fd
+        if fd is None:
+            return ser.readinto(buf) or 0
+        want = len(buf)
+        got = 0
+        while got < want:
+            left = deadline - monotonic()
+            if left <= 0 or not select.select([fd], [], [], left)[0]:
+                break
+            k = os.readv(fd, [buf[got:]])
+            if not k:
+                break
+            got += k
+        return got
 
-        fn = getattr(self.client, "write_register", None)
-        if fn is None:
-            logger.error(f"[{self.name}] client has no write_register")
+    def _call_write(self, unit: int, address: int, value: int | List[int]) -> bool:
+        """Write one register (FC6) or, given a list, consecutive registers (FC16)."""
+        if not self.ok or self.client is None:
             return False
 
-        if self._addr_kw:
-            kwargs = {"address": address, "value": value, self._addr_kw: unit}
-            try:
-                rq = fn(**kwargs)
-            except TypeError as e:
-                logger.debug(f"[{self.name}] write_register kw call failed ({e}), retrying positional.")
-                rq = None
-            except Exception as e:
-                logger.debug(f"[{self.name}] write_register error: {e}")
-                return False
+        if isinstance(value, list):
+            fn_name, call = "write_registers", self._write_registers
         else:
-            rq = None
+            fn_name, call = "write_register", self._write_register
+        if self._read_cache:
+            self._invalidate_cache(unit, address, len(value) if isinstance(value, list) else 1)
+        if call is None:
+            logger.error(f"[{self.name}] client has no {fn_name}")
+            return False
 
-        if rq is None:
-            try:
-                rq = fn(address, value, unit)
-            except Exception as e:
-                logger.debug(f"[{self.name}] write_register positional error: {e}")
-                return False
+        self._wait_silence()
+        try:
+            rq = call(address, value, unit)
+        except TypeError as e:
+            rq = self._retry_positional(fn_name, e, address, value, unit)
+        except Exception as e:
+            logger.debug("[{}] {} error: {}", self.name, fn_name, e)
+            return False
+        finally:
+            self._last_frame_end = monotonic()
 
-        return getattr(rq, "isError", lambda: True)() is False
+        return bool(rq) and getattr(rq, "isError", lambda: True)() is False
 
     # --- public API used by drivers ---
-    def read_input(self, unit: int, address: int, count: int = 1) -> Optional[List[int]]:
-        return self._call_read("input", unit, address, count)
+    def read_input(self, unit: int, address: int, count: int = 1) -> Optional[array]:
+        """Read input registers (FC4) as ``array('H')``, or None on failure."""
+        return self._submit(("input", unit, address, count), None)
 
-    def read_holding(self, unit: int, address: int, count: int = 1) -> Optional[List[int]]:
-        return self._call_read("holding", unit, address, count)
+    def read_holding(self, unit: int, address: int, count: int = 1) -> Optional[array]:
+        """Read holding registers (FC3) as ``array('H')``, or None on failure."""
+        return self._submit(("holding", unit, address, count), None)
 
     def write_holding(self, unit: int, address: int, value: int) -> bool:
-        return self._call_write(unit, address, value)
+        return self._submit(None, self._call_write, unit, address, value, failed=False)
+
+    def write_holding_block(self, unit: int, address: int, values: List[int]) -> bool:
+        """Write consecutive holding registers starting at ``address`` in one FC16 request."""
+        return self._submit(None, self._call_write, unit, address, list(values), failed=False)
+
+    def read_block(self, which: str, unit: int, start: int, count: int) -> Optional[array]:
+        """
+        Read ``count`` consecutive registers, split into as few requests as the
+        125-register PDU limit allows. Returns None if any request fails.
+        """
+        return self._submit(None, self._read_block, which, unit, start, count)
+
+    def read_plan(self, which: str, unit: int, spans: List[tuple[int, int]],
+                  gap_tolerance: int = 2) -> dict[int, Optional[array]]:
+        """
+        Read several (address, width) spans of one unit with as few transactions as possible.
 
-    def try_until_ok(self, fn, retries: int = 1, delay: float = 0.05, *a, **kw):
-        for _ in range(max(1, retries)):
+        Spans are sorted and merged into runs when the hole between them is at most
+        ``gap_tolerance`` registers; each run is read with one request. If a merged run
+        fails, its spans are re-read one by one so a single bad address does not fail
+        the others. Returns {address: registers or None}.
+        """
+        res = self._submit(None, self._read_spans, which, unit, spans, gap_tolerance) or {}
+        return {addr: regs for (addr, _), regs in res.items()}
+
+    def _read_block(self, which: str, unit: int, start: int, count: int) -> Optional[array]:
+        out = array("H")
+        while count > 0:
+            n = min(count, self.MAX_READ_REGS)
+            regs = self._call_read(which, unit, start, n)
+            if regs is None or len(regs) < n:
+                return None
+            out.extend(regs[:n])
+            start += n
+            count -= n
+        return out
+
+    def _read_spans(self, which: str, unit: int, spans: List[tuple[int, int]],
+                    gap_tolerance: int = 2) -> dict[tuple[int, int], Optional[array]]:
+        """Unqueued body of read_plan(); results keyed by (address, width)."""
+        runs: List[tuple[int, int, List[tuple[int, int]]]] = []  # (start, end, spans)
+        for addr, width in sorted(spans):
+            end = addr + width
+            if runs and addr - runs[-1][1] <= gap_tolerance and end - runs[-1][0] <= self.MAX_READ_REGS:
+                start, prev_end, members = runs[-1]
+                runs[-1] = (start, max(prev_end, end), members + [(addr, width)])
+            else:
+                runs.append((addr, end, [(addr, width)]))
+
+        out: dict[tuple[int, int], Optional[array]] = {}
+        for start, end, members in runs:
+            regs = self._read_block(which, unit, start, end - start)
+            for addr, width in members:
+                if regs is not None:
+                    out[addr, width] = regs[addr - start:addr - start + width]
+                elif len(members) > 1:
+                    out[addr, width] = self._read_block(which, unit, addr, width)
+                else:
+                    out[addr, width] = None
+        return out
+
+    def try_until_ok(self, fn, retries: int = 3, base: float = 0.01, cap: float = 0.2,
+                     deadline_s: Optional[float] = None, *a, **kw):
+        """
+        Call ``fn(*a, **kw)`` until it returns non-None, up to ``retries`` attempts.
+
+        Between attempts waits a randomized exponential backoff
+        ``min(cap, base * 2**i * uniform(0.5, 1))``. The whole call is bounded by
+        ``deadline_s`` seconds (default: ``spec.timeout_ms * retries``); the last wait
+        is shortened to fit and no retry is started past the deadline.
+        """
+        retries = max(1, retries)
+        if deadline_s is None:
+            deadline_s = self.spec.timeout_ms * retries / 1000.0
+        deadline = monotonic() + deadline_s
+        for i in range(retries):
             try:
                 out = fn(*a, **kw)
                 if out is not None:
                     return out
             except Exception as e:
-                logger.debug(f"[{self.name}] try_until_ok error: {e}")
-            sleep(delay)
+                logger.debug("[{}] try_until_ok error: {}", self.name, e)
+            left = deadline - monotonic()
+            if i == retries - 1 or left <= 0:
+                break
+            d = min(cap, base * (2 ** i) * random.uniform(0.5, 1.0))
+            sleep(min(d, left))
         return None
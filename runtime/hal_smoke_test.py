@@ -1,3 +1,4 @@
+import sys
 from time import sleep
 from loguru import logger
 from hal.hal import HAL
@@ -6,7 +7,7 @@ from hal.hal import HAL
 Smoke test for the integrated HAL.
 
 - Opens both control_bus and daq_bus.
-- Prints snapshots of key tags every second.
+- Prints snapshots of key tags, one per DAQ poll period.
 - Reads raw registers from AI1001 (DAM-3151+H) for the channels defined in the IO table.
 - Finally drives all actuators to a safe state (0 % / 0 V, low pump speed).
 """
@@ -16,36 +17,45 @@ AI_TAGS = ["T_env", "RH_env", "P_shell",
            "CV1001_fb", "CV1002_fb", "CV1003_fb",
            "FT1001", "FT1002"]
 
+# Tags reported from each snapshot pass
+REPORT_TAGS = ["T_hot", "T_cold"] + AI_TAGS
+
 
 def main():
+    # One INFO sink instead of loguru's default DEBUG stderr sink: bus-level debug records are
+    # then dropped before formatting, and formatting/writing happens on loguru's worker thread.
+    logger.remove()
+    logger.add(sys.stderr, level="INFO", format="{time:HH:mm:ss.SSS} {level: <7} {message}", enqueue=True)
+
     hal = HAL("config/plant.yaml")
     hal.start()
     try:
         for i in range(8):
             snap = hal.snapshot()
             logger.info(f"Snapshot #{i}")
-            for tag in ["T_hot", "T_cold"] + AI_TAGS:
+            for tag in REPORT_TAGS:
                 tv = snap.get(tag)
                 if tv is not None:
                     logger.info(f"  {tag}: value={tv['value']}, quality={tv['quality']}")
-            sleep(1.0)
+            sleep(hal.poll_period_s)  # the HAL polls on its own; wait one scan per pass
 
         # Direct raw read from AI1001 via driver
         ai = getattr(hal, "devices", {}).get("AI1001")
         if ai is not None:
             logger.info("Reading raw channels from AI1001 via driver ...")
+            regs = ai.read_block(16, 15)  # CH16–30 in a single transaction
             for ch in [16, 17, 18, 19, 24, 25, 26, 28, 29, 30]:
-                raw = ai.read_channel(ch)
+                raw = None if regs is None else regs[ch - 16]
                 logger.info(f"  AI1001 CH{ch:02d}: raw={raw}")
         else:
             logger.warning("AI1001 not found in hal.devices")
 
         logger.info("Setting safe outputs to 0 (or min pump) ...")
-        for tag in ("heater_cmd", "heater2_cmd", "valve_cmd"):
-            hal.write(tag, 0.0)
-        hal.write("pump_cmd", 20.0)  # keep a trickle by default; set 0.0 if you prefer
+        # One batch: outputs on the same device go out as a single multi-register write
+        hal.write_many({"heater_cmd": 0.0, "heater2_cmd": 0.0, "valve_cmd": 0.0,
+                        "pump_cmd": 20.0})  # keep a trickle by default; set 0.0 if you prefer
 
-        sleep(1.0)
+        sleep(hal.poll_period_s)  # let the control loop apply the batch
         logger.info("Snapshot after writes:")
         logger.info(hal.snapshot())
     finally:
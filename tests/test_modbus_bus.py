@@ -0,0 +1,177 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from hal import modbus_bus
+from hal.modbus_bus import BusSpec, ModbusBus
+
+GATE_ADDR = 999  # writes to this address hold the I/O thread until the test releases them
+
+
+class _Response:
+    def __init__(self, registers=None):
+        self.registers = registers
+
+    def isError(self):
+        return False
+
+
+class FakeClient:
+    """pymodbus 3.x-like client that records every call with the thread that made it."""
+
+    def __init__(self, **kw):
+        self.calls = []
+        self.mem = {}
+        self.gate = threading.Event()
+        self.gate_entered = threading.Event()
+
+    def connect(self):
+        return True
+
+    def close(self):
+        pass
+
+    def is_socket_open(self):
+        return True
+
+    def read_holding_registers(self, address, *, count=1, device_id=1):
+        self.calls.append(("rh", device_id, address, count, threading.current_thread()))
+        return _Response([self.mem.get((device_id, address + i), address + i) for i in range(count)])
+
+    def read_input_registers(self, address, *, count=1, device_id=1):
+        self.calls.append(("ri", device_id, address, count, threading.current_thread()))
+        return _Response([address + i for i in range(count)])
+
+    def write_register(self, address, value, *, device_id=1):
+        if address == GATE_ADDR:
+            self.gate_entered.set()
+            self.gate.wait(5.0)
+            return _Response()
+        self.calls.append(("w", device_id, address, value, threading.current_thread()))
+        self.mem[device_id, address] = value
+        return _Response()
+
+    def write_registers(self, address, values, *, device_id=1):
+        self.calls.append(("wm", device_id, address, list(values), threading.current_thread()))
+        for i, v in enumerate(values):
+            self.mem[device_id, address + i] = v
+        return _Response()
+
+
+class BusTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(modbus_bus, "_client_class", lambda: (FakeClient, "test"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_bus(self, **spec) -> ModbusBus:
+        bus = ModbusBus("test", BusSpec(port="fake", **{"cache_ttl_ms": 0, **spec}))
+        self.assertTrue(bus.open())
+        self.addCleanup(bus.close)
+        return bus
+
+    def hold_io_thread(self, bus: ModbusBus) -> threading.Thread:
+        """Park the I/O thread inside a gated write so that later requests queue up."""
+        t = threading.Thread(target=bus.write_holding, args=(1, GATE_ADDR, 0))
+        t.start()
+        self.assertTrue(bus.client.gate_entered.wait(2.0))
+        return t
+
+    @staticmethod
+    def wait_queued(bus: ModbusBus, n: int):
+        deadline = time.monotonic() + 2.0
+        while bus._io_q.qsize() < n and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    @staticmethod
+    def reads(bus: ModbusBus):
+        return [c[:4] for c in bus.client.calls if c[0] in ("rh", "ri")]
+
+
+class IoThreadTest(BusTestCase):
+    def test_adjacent_reads_coalesce(self):
+        bus = self.open_bus()
+        gate = self.hold_io_thread(bus)
+        results = {}
+
+        def read(name, address, count):
+            results[name] = bus.read_holding(1, address, count)
+
+        readers = [threading.Thread(target=read, args=args)
+                   for args in (("a", 0, 2), ("b", 0, 2), ("c", 2, 2))]
+        for t in readers:
+            t.start()
+        self.wait_queued(bus, len(readers))
+        bus.client.gate.set()
+        for t in readers + [gate]:
+            t.join(2.0)
+
+        self.assertEqual(self.reads(bus), [("rh", 1, 0, 4)])
+        self.assertEqual(results["a"].tolist(), [0, 1])
+        self.assertEqual(results["b"].tolist(), [0, 1])
+        self.assertEqual(results["c"].tolist(), [2, 3])
+        self.assertIsNot(results["a"], results["b"])  # each caller owns its registers
+
+    def test_read_after_write_sees_it(self):
+        bus = self.open_bus()
+        gate = self.hold_io_thread(bus)
+        writer = threading.Thread(target=bus.write_holding, args=(1, 5, 7))
+        writer.start()
+        self.wait_queued(bus, 1)
+        result = []
+        reader = threading.Thread(target=lambda: result.append(bus.read_holding(1, 5, 1)))
+        reader.start()
+        self.wait_queued(bus, 2)
+        bus.client.gate.set()
+        for t in (writer, reader, gate):
+            t.join(2.0)
+
+        ops = [c[0] for c in bus.client.calls]
+        self.assertEqual(ops, ["w", "rh"])
+        self.assertEqual(result[0].tolist(), [7])
+
+    def test_timed_out_write_is_cancelled(self):
+        bus = self.open_bus(timeout_ms=50)
+        gate = self.hold_io_thread(bus)
+        self.assertIs(bus.write_holding(1, 5, 7), False)
+        bus.client.gate.set()
+        gate.join(2.0)
+        bus.read_holding(1, 0, 1)  # once this returns, the queue behind the gate has drained
+        self.assertNotIn("w", [c[0] for c in bus.client.calls])
+
+    def test_runs_inline_without_io_thread(self):
+        bus = ModbusBus("test", BusSpec(port="fake", cache_ttl_ms=0))
+        bus.client, bus.ok = FakeClient(), True
+        bus._detect_addr_kw()
+        bus._bind_calls()
+        self.assertEqual(bus.read_holding(1, 3, 2).tolist(), [3, 4])
+        self.assertTrue(bus.write_holding(1, 3, 9))
+        self.assertTrue(all(c[4] is threading.current_thread() for c in bus.client.calls))
+
+
+class ReadCacheTest(BusTestCase):
+    def test_write_invalidates_overlapping_entries(self):
+        bus = self.open_bus(cache_ttl_ms=60_000)
+        bus.read_holding(1, 0, 4)
+        bus.read_holding(1, 10, 2)
+        bus.read_input(1, 0, 4)
+        self.assertEqual(bus.read_holding(1, 0, 4).tolist(), [0, 1, 2, 3])
+        self.assertEqual(len(self.reads(bus)), 3)  # the repeat was served from cache
+
+        bus.write_holding(1, 2, 9)
+        self.assertNotIn(("holding", 1, 0, 4), bus._read_cache)
+        self.assertIn(("holding", 1, 10, 2), bus._read_cache)
+        self.assertIn(("input", 1, 0, 4), bus._read_cache)
+        self.assertEqual(bus.read_holding(1, 0, 4).tolist(), [0, 1, 9, 3])
+        self.assertEqual(len(self.reads(bus)), 4)
+
+    def test_block_write_invalidates_span(self):
+        bus = self.open_bus(cache_ttl_ms=60_000)
+        bus.read_holding(1, 8, 2)
+        bus.write_holding_block(1, 6, [1, 2, 3])
+        self.assertNotIn(("holding", 1, 8, 2), bus._read_cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import struct
+import unittest
+from array import array
+
+from hal.modbus_rtu import (FC_READ_HOLDING, FC_READ_INPUT, FC_WRITE_SINGLE, FC_WRITE_MULTIPLE,
+                            crc16, decode_read, encode_read, expected_len)
+
+
+def _reply(unit: int, fc: int, regs: list[int]) -> bytearray:
+    """Build a well-formed read reply (big-endian registers, little-endian CRC)."""
+    frame = bytearray(struct.pack(f">BBB{len(regs)}H", unit, fc, 2 * len(regs), *regs))
+    frame += struct.pack("<H", crc16(frame))
+    return frame
+
+
+class Crc16Test(unittest.TestCase):
+    def test_reference_frame(self):
+        # 01 03 00 00 00 0A -> CRC bytes C5 CD on the wire
+        self.assertEqual(struct.pack("<H", crc16(bytes.fromhex("01030000000A"))), bytes.fromhex("C5CD"))
+
+    def test_prefix_length(self):
+        data = bytes.fromhex("01030000000AFFFF")
+        self.assertEqual(crc16(data, 6), crc16(data[:6]))
+
+    def test_long_frame_matches_bytewise(self):
+        data = bytes(range(200))
+        crc = 0xFFFF
+        for b in data:
+            crc ^= b
+            for _ in range(8):
+                crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        self.assertEqual(crc16(data), crc)
+
+
+class EncodeReadTest(unittest.TestCase):
+    def test_encode(self):
+        buf = bytearray(8)
+        self.assertEqual(encode_read(buf, 1, FC_READ_HOLDING, 0, 10), 8)
+        self.assertEqual(bytes(buf), bytes.fromhex("01030000000AC5CD"))
+
+
+class DecodeReadTest(unittest.TestCase):
+    def test_round_trip(self):
+        out = array("H")
+        for n in (1, 3, 125):
+            regs = [(0x1234 + 257 * i) & 0xFFFF for i in range(n)]
+            frame = _reply(7, FC_READ_INPUT, regs)
+            self.assertEqual(decode_read(frame, len(frame), 7, FC_READ_INPUT, out), n)
+            self.assertEqual(out.tolist(), regs)  # also checks resizing and byte order
+
+    def test_shrinks_output(self):
+        out = array("H", range(10))
+        frame = _reply(1, FC_READ_HOLDING, [0xBEEF])
+        self.assertEqual(decode_read(frame, len(frame), 1, FC_READ_HOLDING, out), 1)
+        self.assertEqual(out.tolist(), [0xBEEF])
+
+    def test_rejects_bad_crc(self):
+        frame = _reply(1, FC_READ_HOLDING, [1, 2])
+        frame[-1] ^= 0xFF
+        self.assertEqual(decode_read(frame, len(frame), 1, FC_READ_HOLDING, array("H")), -1)
+
+    def test_rejects_exception_reply(self):
+        frame = bytearray([1, FC_READ_HOLDING | 0x80, 0x02])
+        frame += struct.pack("<H", crc16(frame))
+        self.assertEqual(decode_read(frame, len(frame), 1, FC_READ_HOLDING, array("H")), -1)
+
+    def test_rejects_other_unit_or_function(self):
+        frame = _reply(2, FC_READ_HOLDING, [1])
+        self.assertEqual(decode_read(frame, len(frame), 1, FC_READ_HOLDING, array("H")), -1)
+        self.assertEqual(decode_read(frame, len(frame), 2, FC_READ_INPUT, array("H")), -1)
+
+    def test_rejects_truncated(self):
+        frame = _reply(1, FC_READ_HOLDING, [1, 2, 3])
+        self.assertEqual(decode_read(frame, len(frame) - 1, 1, FC_READ_HOLDING, array("H")), -1)
+
+
+class ExpectedLenTest(unittest.TestCase):
+    def test_lengths(self):
+        self.assertEqual(expected_len(FC_READ_HOLDING, 10), 25)
+        self.assertEqual(expected_len(FC_READ_INPUT, 1), 7)
+        self.assertEqual(expected_len(FC_WRITE_SINGLE, 1), 8)
+        self.assertEqual(expected_len(FC_WRITE_MULTIPLE, 4), 8)
+        with self.assertRaises(ValueError):
+            expected_len(0x01, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()